@@ -1,10 +1,15 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
 import threading
+import queue
 import time
 import json
 from datetime import datetime
 import os
+import re
 import sys
+import functools
+from bisect import bisect_right
+from collections import OrderedDict, deque
 from spellchecker import SpellChecker
 
 # AI Model imports
@@ -25,6 +30,15 @@ except ImportError:
 
 app = Flask(__name__)
 
+SYSTEM_PROMPT = "You are a helpful and concise AI assistant running on a Raspberry Pi. Provide accurate, relevant answers in 1-3 sentences. If the input contains typos, respond to the corrected intent."
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+# Number of model replies kept in the response cache
+RESPONSE_CACHE_SIZE = 256
+
+# A sentence ends at ., ! or ? followed by whitespace or end of text
+_SENTENCE_RE = re.compile(r'.*?[.!?](?=\s|$)', re.DOTALL)
+
 # Initialize spell checker with custom Indonesian word list
 spell = SpellChecker()
 try:
@@ -34,21 +48,62 @@ try:
 except FileNotFoundError:
     print("Warning: id_words.txt not found, using default spell checker.")
 
+_known_words = spell.word_frequency.dictionary
+
+@functools.lru_cache(maxsize=8192)
+def _correct_word(word):
+    """Return the spell-corrected form of a single word (memoized)"""
+    if word in _known_words:
+        return word
+    # Leave numbers, URLs, code, punctuated tokens and acronyms alone
+    if not word.replace("'", "").isalpha() or (len(word) > 1 and word.isupper()):
+        return word
+    return spell.correction(word) or word
+
 def fix_typo(text):
     """Correct typos in user input using pyspellchecker"""
-    words = text.split()
-    corrected = [spell.correction(w) if spell.correction(w) else w for w in words]
-    return " ".join(corrected)
+    # Single ASCII words are still corrected: they are the typical short
+    # greetings ("helo") that must match prompts.json after correction
+    if len(text) < 4:
+        return text
+    return " ".join(_correct_word(w) for w in text.split())
+
+def _total_memory():
+    """Return total physical memory in bytes, or 0 if unknown"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+def _prefetch_file(path):
+    """Ask the kernel to read a file into the page cache ahead of use"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except (OSError, AttributeError) as e:
+        print(f"Warning: could not prefetch {path}: {e}")
 
 class AIAssistant:
     def __init__(self):
         self.model = None
         self.oled = None
         self.chat_history = []
+        self.history_version = 0
+        self.history_epoch = int(time.time())  # Keeps ETags unique across restarts
         self.prompts_db = []
+        self._history_lock = threading.Lock()
+        self._response_cache = OrderedDict()
+        self._model_lock = threading.Lock()  # llama.cpp contexts are not thread-safe
+        self._cache_lock = threading.Lock()
+        self._prompt_haystack = ""
+        self._prompt_offsets = []
         
-        # Load prompts from database
+        # Load prompts and recent conversations from database
         self.load_prompts_db()
+        self.load_history()
         
         # Initialize OLED if available
         if OLED_AVAILABLE:
@@ -59,6 +114,14 @@ class AIAssistant:
                 print(f"OLED initialization failed: {e}")
                 self.oled = None
         
+        # Display updates run on their own thread so I2C transfers never
+        # block response generation; a second worker returns it to idle
+        self._oled_queue = queue.Queue(maxsize=4)
+        self._idle_event = threading.Event()
+        if self.oled:
+            threading.Thread(target=self._oled_worker, daemon=True).start()
+            threading.Thread(target=self._idle_worker, daemon=True).start()
+        
         # Initialize AI model
         self.load_ai_model()
     
@@ -70,6 +133,37 @@ class AIAssistant:
         except Exception as e:
             print(f"Error loading prompts.json: {e}")
             self.prompts_db = []
+        self._index_prompts()
+    
+    def load_history(self):
+        """Load the last 50 turns from history.jsonl into memory"""
+        try:
+            with open('database/history.jsonl', 'r', encoding='utf-8') as f:
+                lines = deque(f, maxlen=50)
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # Skip a line cut short by a crash mid-append
+            self.chat_history.append({
+                "timestamp": entry.get("timestamp"),
+                "user": entry.get("prompt", ""),
+                "assistant": entry.get("response", "")
+            })
+    
+    def _index_prompts(self):
+        """Join lowercased prompts into one searchable string"""
+        prompts = [entry['prompt'].lower() for entry in self.prompts_db]
+        offsets = []
+        position = 0
+        for prompt in prompts:
+            offsets.append(position)
+            position += len(prompt) + 1
+        # Inputs containing NUL are rejected, so matches never span two prompts
+        self._prompt_haystack = "\0".join(prompts)
+        self._prompt_offsets = offsets
     
     def load_ai_model(self):
         """Load TinyLlama model using llama.cpp"""
@@ -81,20 +175,41 @@ class AIAssistant:
             print("Loading TinyLlama model... This may take a moment.")
             
             # Path to the TinyLlama model (replace with LLaMA 3 path when available)
-            model_path = "./models/tinyllama-1.1b-chat-v1.0.Q6_K.gguf"
+            model_path = "./models/tinyllama-1.1b-chat-v1.0.Q4_K_M.gguf"
             
             if not os.path.exists(model_path):
                 raise FileNotFoundError(f"Model file not found at {model_path}")
             
+            # Lock the weights in RAM when they fit comfortably, so they are
+            # never evicted and re-read from the SD card mid-generation.
+            # On small boards, prefetch them into the page cache instead.
+            use_mlock = os.path.getsize(model_path) * 4 <= _total_memory()
+            if not use_mlock:
+                _prefetch_file(model_path)
+            
             # Load the model with llama.cpp
+            n_threads = os.cpu_count() or 4
             self.model = Llama(
                 model_path=model_path,
                 n_ctx=512,  # Context length
-                n_threads=4,  # Use 4 CPU threads
+                n_batch=128,  # Prompt tokens evaluated per batch
+                n_threads=n_threads,  # Use all CPU cores for generation
+                n_threads_batch=n_threads,  # ...and for prompt processing
                 n_gpu_layers=0,  # CPU-only for Raspberry Pi
+                use_mmap=True,  # Map weights from disk instead of copying them
+                use_mlock=use_mlock,
+                logits_all=False,  # Only keep logits for the last token
+                offload_kqv=False,
                 chat_format="chatml"  # Use TinyLlama's default chat template
             )
             
+            # Tokenize and prefill the ChatML system turn once; llama.cpp
+            # reuses the matching prefix of the live context, so requests
+            # only evaluate the history and user message
+            system_turn = f"<|im_start|>system\n{SYSTEM_PROMPT}<|im_end|>\n"
+            system_tokens = self.model.tokenize(system_turn.encode('utf-8'), special=True)
+            self.model.eval(system_tokens)
+            
             print("TinyLlama model loaded successfully!")
             
         except Exception as e:
@@ -103,65 +218,56 @@ class AIAssistant:
     
     def get_prompt_from_db(self, user_input):
         """Check if user input matches a prompt in prompts.json"""
-        cleaned_input = fix_typo(user_input.lower())
-        for entry in self.prompts_db:
-            if cleaned_input in entry['prompt'].lower():
-                return entry['response']
-        return None
+        return self._lookup_prompt(fix_typo(user_input.lower()))
+    
+    def _lookup_prompt(self, cleaned_input):
+        """Find the response for already spell-corrected, lowercased input"""
+        if not self.prompts_db or "\0" in cleaned_input:
+            return None
+        # A single C-level scan returns the earliest prompt containing the input
+        position = self._prompt_haystack.find(cleaned_input)
+        if position < 0:
+            return None
+        index = bisect_right(self._prompt_offsets, position) - 1
+        return self.prompts_db[index]['response']
     
     def generate_response(self, user_input):
         """Generate AI response with spell correction and database fallback"""
+        ai_response = None
+        for event in self.stream_response(user_input):
+            ai_response = event.get('response', ai_response)
+        return ai_response
+    
+    def stream_response(self, user_input):
+        """Yield {'token': ...} events while generating, then {'response': ...}"""
+        # Set once the reply is saved and the speaking face is queued
+        completed = False
         try:
             # Show thinking expression
             if self.oled:
-                self.oled.show_expression("thinking")
+                self.show_expression("thinking")
             
             # Correct typos in user input
             cleaned_input = fix_typo(user_input)
             
-            # Check prompts.json for a direct match
-            db_response = self.get_prompt_from_db(cleaned_input)
+            # Check prompts.json for a direct match (input is already corrected)
+            db_response = self._lookup_prompt(cleaned_input.lower())
             if db_response:
                 ai_response = db_response
             elif self.model:
-                # Build chat history in ChatML format
-                messages = [
-                    {
-                        "role": "system",
-                        "content": "You are a helpful and concise AI assistant running on a Raspberry Pi. Provide accurate, relevant answers in 1-3 sentences. If the input contains typos, respond to the corrected intent."
-                    }
-                ]
-                # Add recent chat history (last 2 interactions)
-                for entry in self.chat_history[-2:]:
-                    messages.append({"role": "user", "content": entry['user']})
-                    messages.append({"role": "assistant", "content": entry['assistant']})
-                
-                # Add corrected user input
-                messages.append({"role": "user", "content": cleaned_input})
-                
-                # Generate response using ChatML format
-                response = self.model.create_chat_completion(
-                    messages=messages,
-                    max_tokens=100,
-                    temperature=0.6,
-                    top_k=50,
-                    top_p=0.9,
-                    stop=["<|user|>", "<|assistant|>", "</s>"]
+                # Recent turns are part of the key, since they shape the reply
+                recent_turns = tuple(
+                    (entry['user'], entry['assistant']) for entry in self.chat_history[-2:]
                 )
-                
-                # Extract the assistant's response
-                ai_response = response['choices'][0]['message']['content'].strip()
-                
-                # Clean up the response
-                sentences = ai_response.split('. ')
-                if len(sentences) > 3:
-                    ai_response = '. '.join(sentences[:3]) + '.'
-                if not ai_response.endswith('.'):
-                    ai_response += '.'
-                
-                # Check if response is too similar to input or too short
-                if cleaned_input.lower() in ai_response.lower() or len(ai_response) < 15:
-                    ai_response = "Could you clarify or provide more details for a better response?"
+                key = (cleaned_input.strip(), recent_turns)
+                ai_response = self._cached_response(key)
+                if ai_response is None:
+                    chunks = []
+                    for token in self._stream_model_tokens(*key):
+                        chunks.append(token)
+                        yield {'token': token}
+                    ai_response = self._clean_model_response(key[0], "".join(chunks))
+                    self._cache_response(key, ai_response)
             else:
                 # Fallback responses
                 fallback_responses = [
@@ -172,48 +278,153 @@ class AIAssistant:
                 ]
                 ai_response = fallback_responses[len(cleaned_input) % len(fallback_responses)]
             
-            # Save to history.json
+            # Save to history.jsonl
             self.save_to_history(user_input, ai_response)
             
             # Show speaking expression
             if self.oled:
-                self.oled.show_expression("speaking")
+                self.show_expression("speaking")
                 # Return to idle after a delay
-                threading.Timer(3.0, lambda: self.oled.show_expression("idle")).start()
+                self._idle_event.set()
+            completed = True
             
-            return ai_response
+            yield {'response': ai_response}
             
         except Exception as e:
             print(f"Error generating response: {e}")
-            return "I apologize, but I encountered an error while processing your request."
+            yield {'response': "I apologize, but I encountered an error while processing your request."}
+        finally:
+            # A client that disconnects mid-stream closes this generator, so
+            # nothing below the interrupted yield runs. The partial reply is
+            # dropped (not saved or cached); just stop the thinking face.
+            if not completed and self.oled:
+                self.show_expression("idle")
     
-    def add_to_history(self, user_input, ai_response):
+    def _stream_model_tokens(self, cleaned_input, recent_turns):
+        """Yield reply text from the model as it is generated"""
+        # Build chat history in ChatML format
+        messages = [SYSTEM_MESSAGE]
+        # Add recent chat history (last 2 interactions)
+        for user_turn, assistant_turn in recent_turns:
+            messages.append({"role": "user", "content": user_turn})
+            messages.append({"role": "assistant", "content": assistant_turn})
+        
+        # Add corrected user input
+        messages.append({"role": "user", "content": cleaned_input})
+        
+        # Generate response using ChatML format, one request at a time;
+        # spell checking and HTTP handling keep running concurrently
+        with self._model_lock:
+            stream = self.model.create_chat_completion(
+                messages=messages,
+                max_tokens=100,
+                temperature=0.6,
+                top_k=50,
+                top_p=0.9,
+                stop=["<|user|>", "<|assistant|>", "</s>", "Human:", "\nUser:"],
+                stream=True
+            )
+            for chunk in stream:
+                token = chunk['choices'][0]['delta'].get('content')
+                if token:
+                    yield token
+    
+    def _clean_model_response(self, cleaned_input, ai_response):
+        """Trim a raw model reply to at most three sentences"""
+        ai_response = ai_response.strip()
+        
+        # Clean up the response
+        sentences = _SENTENCE_RE.findall(ai_response)
+        if len(sentences) > 3:
+            ai_response = "".join(sentences[:3])
+        if not ai_response.endswith(('.', '!', '?')):
+            ai_response += '.'
+        
+        # Check if response is too similar to input or too short
+        if cleaned_input.lower() in ai_response.lower() or len(ai_response) < 15:
+            ai_response = "Could you clarify or provide more details for a better response?"
+        
+        return ai_response
+    
+    def _cached_response(self, key):
+        """Return a cached model reply for (input, recent turns), if any"""
+        with self._cache_lock:
+            ai_response = self._response_cache.get(key)
+            if ai_response is not None:
+                self._response_cache.move_to_end(key)
+            return ai_response
+    
+    def _cache_response(self, key, ai_response):
+        """Store a model reply, evicting the least recently used one"""
+        with self._cache_lock:
+            self._response_cache[key] = ai_response
+            self._response_cache.move_to_end(key)
+            if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+    
+    def show_expression(self, expression_type):
+        """Queue an OLED expression change without waiting for the display"""
+        try:
+            self._oled_queue.put_nowait(expression_type)
+        except queue.Full:
+            # Only the latest state matters, so drop the oldest pending one
+            try:
+                self._oled_queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self._oled_queue.put_nowait(expression_type)
+            except queue.Full:
+                pass
+    
+    def _oled_worker(self):
+        """Apply queued expression changes to the OLED"""
+        while True:
+            expression_type = self._oled_queue.get()
+            try:
+                self.oled.show_expression(expression_type)
+            except Exception as e:
+                print(f"Error updating OLED: {e}")
+    
+    def _idle_worker(self):
+        """Show the idle face 3 seconds after the most recent response"""
+        while True:
+            self._idle_event.wait()
+            self._idle_event.clear()
+            # Restart the countdown whenever another response comes in
+            while self._idle_event.wait(timeout=3.0):
+                self._idle_event.clear()
+            self.show_expression("idle")
+    
+    def add_to_history(self, user_input, ai_response, timestamp=None):
         """Add conversation to in-memory history"""
         self.chat_history.append({
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp or datetime.now().isoformat(),
             "user": user_input,
             "assistant": ai_response
         })
         # Keep only last 50 conversations
         if len(self.chat_history) > 50:
             self.chat_history = self.chat_history[-50:]
+        self.history_version += 1
     
     def save_to_history(self, user_input, ai_response):
-        """Save conversation to history.json"""
+        """Append conversation to history.jsonl"""
         try:
-            history_entry = {
-                "id": len(self.chat_history) + 1,
-                "prompt": user_input,
-                "response": ai_response
-            }
-            with open('database/history.json', 'r+', encoding='utf-8') as f:
-                history = json.load(f)
-                history.append(history_entry)
-                f.seek(0)
-                json.dump(history, f, ensure_ascii=False, indent=2)
-            self.add_to_history(user_input, ai_response)
+            with self._history_lock:
+                timestamp = datetime.now().isoformat()
+                history_entry = {
+                    "id": len(self.chat_history) + 1,
+                    "timestamp": timestamp,
+                    "prompt": user_input,
+                    "response": ai_response
+                }
+                # One JSON object per line, so each turn is a single append
+                with open('database/history.jsonl', 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(history_entry, ensure_ascii=False) + "\n")
+                self.add_to_history(user_input, ai_response, timestamp)
         except Exception as e:
-            print(f"Error saving to history.json: {e}")
+            print(f"Error saving to history.jsonl: {e}")
 
 # Initialize AI Assistant
 assistant = AIAssistant()
@@ -235,10 +446,20 @@ def chat():
         
         # Show listening expression
         if assistant.oled:
-            assistant.oled.show_expression("listening")
+            assistant.show_expression("listening")
         
         print(f"[USER]: {user_input}")
         
+        if data.get('stream'):
+            # Send tokens as server-sent events while the model generates
+            def events():
+                for event in assistant.stream_response(user_input):
+                    if 'response' in event:
+                        print(f"[AI]: {event['response']}")
+                        event['timestamp'] = datetime.now().isoformat()
+                    yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+            return Response(stream_with_context(events()), mimetype='text/event-stream')
+        
         # Generate AI response
         ai_response = assistant.generate_response(user_input)
         
@@ -255,14 +476,12 @@ def chat():
 
 @app.route('/history')
 def history():
-    """Get chat history from history.json"""
-    try:
-        with open('database/history.json', 'r', encoding='utf-8') as f:
-            history = json.load(f)
-        return jsonify(history)
-    except Exception as e:
-        print(f"Error reading history.json: {e}")
-        return jsonify([])
+    """Get recent chat history from memory"""
+    resp = jsonify(assistant.chat_history)
+    # The version only changes when a turn is added, so clients polling
+    # with If-None-Match get an empty 304 until there is something new
+    resp.set_etag(f"{assistant.history_epoch}-{assistant.history_version}")
+    return resp.make_conditional(request)
 
 @app.route('/status')
 def status():
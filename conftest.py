@@ -0,0 +1,38 @@
+"""
+Shared pytest fixtures for the AI Assistant system tests
+"""
+
+import os
+
+import pytest
+
+# Once distilgpt2 is in the local Hugging Face cache, skip the Hub
+# freshness checks; these flags are read when transformers is imported
+_HF_HOME = os.environ.get("HF_HOME", os.path.expanduser("~/.cache/huggingface"))
+if os.path.isdir(os.path.join(_HF_HOME, "hub", "models--distilgpt2")):
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+def pytest_addoption(parser):
+    parser.addoption("--runslow", action="store_true", default=False,
+                     help="run tests marked as slow (e.g. AI model loading)")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: expensive test, only run with --runslow")
+    config.addinivalue_line("markers", "xdist_group(name): run on the same pytest-xdist worker")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runslow"):
+        return
+    skip_slow = pytest.mark.skip(reason="slow test, use --runslow to run")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+@pytest.fixture(scope="session")
+def gpt2():
+    """distilgpt2 tokenizer and model, loaded once per test session"""
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from test_system import load_gpt2
+    return load_gpt2()
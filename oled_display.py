@@ -5,6 +5,7 @@ Supports 128x64 OLED displays using SSD1306
 
 import time
 import threading
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
 try:
@@ -17,6 +18,13 @@ except ImportError:
     print("Install with: pip install adafruit-circuitpython-ssd1306 adafruit-blinka")
     OLED_HARDWARE_AVAILABLE = False
 
+def _pack_ssd1306(pixels):
+    """Pack a (height, width) 0/1 pixel array into SSD1306 page-column bytes"""
+    height, width = pixels.shape
+    # Each byte is a column of 8 rows within a page, top row in the low bit
+    pages = pixels.reshape(height // 8, 8, width).transpose(0, 2, 1)
+    return np.packbits(pages, axis=-1, bitorder='little').ravel()
+
 class OLEDDisplay:
     def __init__(self, width=128, height=64):
         self.width = width
@@ -36,6 +44,27 @@ class OLEDDisplay:
             "thinking": {"eyes": "blink", "mouth": "dots"},
             "speaking": {"eyes": "normal", "mouth": "smile"}
         }
+        
+        # Expressions are static, so render every frame once up front
+        self._frames = {
+            name: self.create_face_image(name) for name in self.expressions
+        }
+        self._thinking_frames = [
+            self._render_face("normal", "dots"),
+            self._render_face("blink", "dots")
+        ]
+        
+        # Pack frames into the SSD1306 page layout once, so the hot path
+        # is a plain buffer copy instead of a per-pixel image conversion
+        self._packed = {}
+        self._thinking_packed = []
+        if self.display:
+            self._packed = {
+                name: self._pack_frame(image) for name, image in self._frames.items()
+            }
+            self._thinking_packed = [
+                self._pack_frame(image) for image in self._thinking_frames
+            ]
     
     def init_display(self):
         """Initialize the OLED display"""
@@ -64,6 +93,11 @@ class OLEDDisplay:
     
     def create_face_image(self, expression_type):
         """Create a face image based on expression type"""
+        expression = self.expressions.get(expression_type, self.expressions["idle"])
+        return self._render_face(expression["eyes"], expression["mouth"])
+    
+    def _render_face(self, eyes, mouth):
+        """Draw a face with the given eye and mouth styles"""
         # Create image
         image = Image.new('1', (self.width, self.height))
         draw = ImageDraw.Draw(image)
@@ -75,10 +109,8 @@ class OLEDDisplay:
         mouth_y = 45
         mouth_x = self.width // 2
         
-        expression = self.expressions.get(expression_type, self.expressions["idle"])
-        
         # Draw eyes
-        if expression["eyes"] == "normal":
+        if eyes == "normal":
             # Normal open eyes
             draw.ellipse([left_eye_x-8, eye_y-6, left_eye_x+8, eye_y+6], fill=1)
             draw.ellipse([right_eye_x-8, eye_y-6, right_eye_x+8, eye_y+6], fill=1)
@@ -86,21 +118,21 @@ class OLEDDisplay:
             draw.ellipse([left_eye_x-3, eye_y-3, left_eye_x+3, eye_y+3], fill=0)
             draw.ellipse([right_eye_x-3, eye_y-3, right_eye_x+3, eye_y+3], fill=0)
             
-        elif expression["eyes"] == "blink":
+        elif eyes == "blink":
             # Blinking eyes (lines)
             draw.line([left_eye_x-8, eye_y, left_eye_x+8, eye_y], fill=1, width=2)
             draw.line([right_eye_x-8, eye_y, right_eye_x+8, eye_y], fill=1, width=2)
         
         # Draw mouth
-        if expression["mouth"] == "straight":
+        if mouth == "straight":
             # Straight mouth
             draw.line([mouth_x-15, mouth_y, mouth_x+15, mouth_y], fill=1, width=2)
             
-        elif expression["mouth"] == "smile":
+        elif mouth == "smile":
             # Smiling mouth (U shape)
             draw.arc([mouth_x-15, mouth_y-5, mouth_x+15, mouth_y+10], 0, 180, fill=1, width=2)
             
-        elif expression["mouth"] == "dots":
+        elif mouth == "dots":
             # Thinking dots
             draw.ellipse([mouth_x-12, mouth_y-2, mouth_x-8, mouth_y+2], fill=1)
             draw.ellipse([mouth_x-4, mouth_y-2, mouth_x, mouth_y+2], fill=1)
@@ -108,6 +140,16 @@ class OLEDDisplay:
         
         return image
     
+    def _pack_frame(self, image):
+        """Convert a PIL frame into raw SSD1306 framebuffer bytes"""
+        pixels = np.asarray(image, dtype=np.uint8)
+        return _pack_ssd1306(pixels).tobytes()
+    
+    def _show_packed(self, packed):
+        """Copy a pre-packed frame into the display buffer and push it"""
+        self.display.buf[:] = packed
+        self.display.show()
+    
     def show_expression(self, expression_type):
         """Display an expression on the OLED"""
         self.current_expression = expression_type
@@ -129,12 +171,9 @@ class OLEDDisplay:
     def _display_static_expression(self, expression_type):
         """Display a static expression"""
         try:
-            image = self.create_face_image(expression_type)
-            
             if self.display:
                 # Display on hardware
-                self.display.image(image)
-                self.display.show()
+                self._show_packed(self._packed.get(expression_type, self._packed["idle"]))
             else:
                 # Simulate display in console
                 self._print_ascii_face(expression_type)
@@ -144,49 +183,16 @@ class OLEDDisplay:
     
     def _thinking_animation(self):
         """Animate thinking expression with blinking"""
-        blink_states = ["normal", "blink"]
         blink_index = 0
         
         while not self.stop_animation:
             try:
-                # Create thinking expression with alternating blink
-                expression = {
-                    "eyes": blink_states[blink_index],
-                    "mouth": "dots"
-                }
-                
-                # Create custom image for animation
-                image = Image.new('1', (self.width, self.height))
-                draw = ImageDraw.Draw(image)
-                
-                # Draw animated eyes
-                eye_y = 20
-                left_eye_x = 35
-                right_eye_x = 85
-                
-                if expression["eyes"] == "normal":
-                    draw.ellipse([left_eye_x-8, eye_y-6, left_eye_x+8, eye_y+6], fill=1)
-                    draw.ellipse([right_eye_x-8, eye_y-6, right_eye_x+8, eye_y+6], fill=1)
-                    draw.ellipse([left_eye_x-3, eye_y-3, left_eye_x+3, eye_y+3], fill=0)
-                    draw.ellipse([right_eye_x-3, eye_y-3, right_eye_x+3, eye_y+3], fill=0)
-                else:
-                    draw.line([left_eye_x-8, eye_y, left_eye_x+8, eye_y], fill=1, width=2)
-                    draw.line([right_eye_x-8, eye_y, right_eye_x+8, eye_y], fill=1, width=2)
-                
-                # Draw thinking dots
-                mouth_y = 45
-                mouth_x = self.width // 2
-                draw.ellipse([mouth_x-12, mouth_y-2, mouth_x-8, mouth_y+2], fill=1)
-                draw.ellipse([mouth_x-4, mouth_y-2, mouth_x, mouth_y+2], fill=1)
-                draw.ellipse([mouth_x+4, mouth_y-2, mouth_x+8, mouth_y+2], fill=1)
-                
                 if self.display:
-                    self.display.image(image)
-                    self.display.show()
+                    self._show_packed(self._thinking_packed[blink_index])
                 else:
                     self._print_ascii_face("thinking")
                 
-                blink_index = (blink_index + 1) % len(blink_states)
+                blink_index = (blink_index + 1) % len(self._thinking_frames)
                 time.sleep(0.8)
                 
             except Exception as e:
@@ -58,17 +58,21 @@ pip install --upgrade pip
 echo "📚 Installing Python dependencies..."
 pip install -r requirements.txt
 
+# Precompile project modules so the first start and test run skip compilation
+echo "🗜️  Precompiling Python bytecode..."
+python -m compileall -q app.py oled_display.py test_system.py test_oled_display.py conftest.py
+
 # Create necessary directories
 echo "📁 Creating project directories..."
 mkdir -p models
 mkdir -p database
 
 # Download TinyLlama model if not exists
-if [ ! -f "models/tinyllama-1.1b-chat-v1.0.Q6_K.gguf" ]; then
+if [ ! -f "models/tinyllama-1.1b-chat-v1.0.Q4_K_M.gguf" ]; then
     echo "⬇️ Downloading TinyLlama model..."
-    wget https://huggingface.co/TheBloke/TinyLlama-1.1B-Chat-v1.0-GGUF/resolve/main/tinyllama-1.1b-chat-v1.0.Q6_K.gguf -P models/
+    wget https://huggingface.co/TheBloke/TinyLlama-1.1B-Chat-v1.0-GGUF/resolve/main/tinyllama-1.1b-chat-v1.0.Q4_K_M.gguf -P models/
 else
-    echo "✅ TinyLlama model already exists in models/tinyllama-1.1b-chat-v1.0.Q6_K.gguf"
+    echo "✅ TinyLlama model already exists in models/tinyllama-1.1b-chat-v1.0.Q4_K_M.gguf"
 fi
 
 # Initialize database files
@@ -90,8 +94,21 @@ if [ ! -f "database/prompts.json" ]; then
 EOF
 fi
 
-if [ ! -f "database/history.json" ]; then
-    echo "[]" > database/history.json
+if [ ! -f "database/history.jsonl" ]; then
+    if [ -f "database/history.json" ]; then
+        # Carry over history from the old single-array format, one turn per line
+        echo "🔄 Converting history.json to history.jsonl..."
+        python3 - << 'EOF'
+import json
+with open('database/history.json', encoding='utf-8') as src:
+    history = json.load(src)
+with open('database/history.jsonl', 'w', encoding='utf-8') as dst:
+    for entry in history:
+        dst.write(json.dumps(entry, ensure_ascii=False) + "\n")
+EOF
+    else
+        touch database/history.jsonl
+    fi
 fi
 
 if [ ! -f "database/users.json" ]; then
@@ -147,8 +164,10 @@ Type=simple
 User=$USER
 WorkingDirectory=$(pwd)
 Environment=PATH=$(pwd)/ai_assistant_env/bin
-ExecStart=$(pwd)/ai_assistant_env/bin/python app.py
+ExecStart=$(pwd)/ai_assistant_env/bin/gunicorn --workers 1 --worker-class gthread --threads 8 --timeout 120 --bind 0.0.0.0:5000 app:app
 Restart=always
+Nice=-5
+LimitMEMLOCK=infinity
 
 [Install]
 WantedBy=multi-user.target
@@ -161,7 +180,7 @@ echo "✅ I2C interface enabled"
 echo "✅ Python virtual environment created"
 echo "✅ Dependencies installed"
 echo "✅ Project directories created"
-echo "✅ TinyLlama model ready at models/tinyllama-1.1b-chat-v1.0.Q6_K.gguf"
+echo "✅ TinyLlama model ready at models/tinyllama-1.1b-chat-v1.0.Q4_K_M.gguf"
 echo "✅ Database files initialized at database/"
 echo ""
 echo "🚀 To start the AI Assistant:"
@@ -93,19 +93,38 @@ class AIAssistant {
         headers: {
           "Content-Type": "application/json",
         },
-        body: JSON.stringify({ message: message }),
+        body: JSON.stringify({ message: message, stream: true }),
       })
 
       if (!response.ok) {
         throw new Error(`HTTP error! status: ${response.status}`)
       }
 
-      const data = await response.json()
-
-      if (data.error) {
-        this.addMessage("assistant", `Error: ${data.error}`)
-      } else {
-        this.addMessage("assistant", data.response)
+      // Show tokens as they arrive, then replace them with the final reply
+      const content = this.addMessage("assistant", "")
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ""
+
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+
+        buffer += decoder.decode(value, { stream: true })
+        const events = buffer.split("\n\n")
+        buffer = events.pop()
+
+        for (const event of events) {
+          if (!event.startsWith("data: ")) continue
+          const data = JSON.parse(event.slice(6))
+
+          if (data.token !== undefined) {
+            content.textContent += data.token
+          } else if (data.response !== undefined) {
+            content.textContent = data.response
+          }
+          this.chatMessages.scrollTop = this.chatMessages.scrollHeight
+        }
       }
 
       this.updateStatus("Ready")
@@ -134,6 +153,8 @@ class AIAssistant {
     this.chatMessages.appendChild(messageDiv)
 
     this.chatMessages.scrollTop = this.chatMessages.scrollHeight
+
+    return content
   }
 
   updateStatus(status) {
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+OLED expression tests against an in-memory SSD1306
+Runs without I2C hardware, so every expression can be checked in parallel
+"""
+
+import time
+import types
+
+import pytest
+
+oled_display = pytest.importorskip("oled_display")
+
+EXPRESSIONS = ["idle", "listening", "thinking", "speaking"]
+
+class FakeSSD1306:
+    """Stand-in for adafruit_ssd1306.SSD1306_I2C that records pushed frames"""
+
+    def __init__(self, width, height, i2c, addr=0x3C):
+        # Same layout as the Adafruit driver: control byte, then the pages
+        self.buffer = bytearray((height // 8) * width + 1)
+        self.buffer[0] = 0x40
+        self.buf = memoryview(self.buffer)[1:]
+        self.frames = []
+
+    def fill(self, color):
+        self.buf[:] = bytes([0xFF if color else 0x00]) * len(self.buf)
+
+    def show(self):
+        self.frames.append(bytes(self.buf))
+
+def _reference_pack(image):
+    """Pack a PIL frame pixel by pixel, as the Adafruit driver does"""
+    width, height = image.size
+    packed = bytearray((height // 8) * width)
+    for y in range(height):
+        for x in range(width):
+            if image.getpixel((x, y)):
+                packed[(y // 8) * width + x] |= 1 << (y % 8)
+    return bytes(packed)
+
+@pytest.fixture(autouse=True)
+def fake_i2c(monkeypatch):
+    """Route OLEDDisplay to FakeSSD1306 instead of the I2C bus"""
+    monkeypatch.setattr(oled_display, "OLED_HARDWARE_AVAILABLE", True)
+    monkeypatch.setattr(oled_display, "board",
+                        types.SimpleNamespace(I2C=lambda: None), raising=False)
+    monkeypatch.setattr(oled_display, "adafruit_ssd1306",
+                        types.SimpleNamespace(SSD1306_I2C=FakeSSD1306), raising=False)
+
+@pytest.fixture
+def oled():
+    """OLEDDisplay backed by FakeSSD1306"""
+    display = oled_display.OLEDDisplay()
+    yield display
+    # Stop the thinking animation thread, if any
+    display.show_expression("idle")
+
+@pytest.mark.parametrize("expr", EXPRESSIONS)
+def test_expression_frame(oled, expr):
+    """Each expression pushes its correctly packed face to the display"""
+    frames = oled.display.frames
+    pushed = len(frames)  # init_display already pushed a blank frame
+    oled.show_expression(expr)
+    assert oled.current_expression == expr
+
+    if expr == "thinking":
+        # The animation thread pushes its first frame right after starting
+        deadline = time.monotonic() + 1.0
+        while len(frames) == pushed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        expected = _reference_pack(oled._thinking_frames[0])
+    else:
+        expected = _reference_pack(oled.create_face_image(expr))
+
+    assert len(frames) > pushed, "no frame was pushed to the display"
+    assert frames[pushed] == expected
+    assert any(expected), "expression rendered a blank frame"
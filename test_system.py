@@ -4,191 +4,314 @@ System Test Script for AI Assistant
 Tests all components before running the main application
 """
 
+import argparse
+import functools
+import importlib.util
+import io
 import sys
 import os
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# pytest is only needed when running this file through pytest
+try:
+    import pytest
+    slow = pytest.mark.slow
+    # Keep every test that drives the I2C display on the same xdist worker
+    hardware = pytest.mark.xdist_group("hardware")
+except ImportError:
+    def slow(func):
+        return func
+    hardware = slow
+
+# Pause between OLED expressions so they can be checked by eye
+INTERACTIVE = False
+
+# Files the application needs, relative to the project root
+_REQUIRED_FILES = frozenset({
+    'app.py',
+    'oled_display.py',
+    'requirements.txt',
+    'templates/index.html',
+    'static/style.css',
+    'static/script.js'
+})
+_REQUIRED_DIRS = frozenset(os.path.dirname(path) for path in _REQUIRED_FILES)
+
+class _ThreadLocalStdout:
+    """sys.stdout stand-in that gives each test thread its own buffer
+    
+    Threads started while a test is capturing (OLED animation, app workers)
+    write to that test's buffer. Anything they print after the test has
+    finished goes straight to the real stream.
+    """
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+        self._thread_start = threading.Thread.start
+    
+    def __enter__(self):
+        router = self
+        thread_start = self._thread_start
+        
+        def start(thread):
+            thread._stdout_buffer = getattr(router._local, "buffer", None)
+            return thread_start(thread)
+        
+        threading.Thread.start = start
+        return self
+    
+    def __exit__(self, *exc_info):
+        threading.Thread.start = self._thread_start
+    
+    def capture(self):
+        self._local.buffer = io.StringIO()
+    
+    def release(self):
+        buffer = self._local.buffer
+        self._local.buffer = None
+        output = buffer.getvalue()
+        buffer.close()  # Late writes from background threads go to the stream
+        return output
+    
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = getattr(threading.current_thread(), "_stdout_buffer", None)
+        if buffer is not None:
+            try:
+                return buffer.write(text)
+            except ValueError:
+                pass  # Closed: the test that started this thread has finished
+        return self._stream.write(text)
+    
+    def flush(self):
+        self._stream.flush()
+
+@functools.lru_cache(maxsize=None)
+def _has_module(name):
+    """Check whether a module is installed without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
 
 def test_imports():
     """Test all required imports"""
     print("🧪 Testing Python imports...")
     
-    try:
-        import flask
-        print("✅ Flask imported successfully")
-    except ImportError as e:
-        print(f"❌ Flask import failed: {e}")
-        return False
+    import flask
+    print("✅ Flask imported successfully")
     
-    try:
-        import transformers
-        import torch
-        print("✅ AI libraries imported successfully")
-    except ImportError as e:
-        print(f"⚠️  AI libraries not available: {e}")
+    # Only check that heavy libraries are installed; importing torch alone
+    # takes over a second, and test_ai_model imports what it needs
+    missing = [name for name in ("transformers", "torch") if not _has_module(name)]
+    if not missing:
+        print("✅ AI libraries available")
+    else:
+        print(f"⚠️  AI libraries not available: {', '.join(missing)}")
         print("   The system will run with fallback responses")
     
-    try:
-        import board
-        import digitalio
-        import adafruit_ssd1306
-        from PIL import Image, ImageDraw
-        print("✅ OLED libraries imported successfully")
-    except ImportError as e:
-        print(f"⚠️  OLED libraries not available: {e}")
+    missing = [name for name in ("board", "digitalio", "adafruit_ssd1306", "PIL")
+               if not _has_module(name)]
+    if not missing:
+        print("✅ OLED libraries available")
+    else:
+        print(f"⚠️  OLED libraries not available: {', '.join(missing)}")
         print("   The system will run without OLED display")
-    
-    return True
 
+@hardware
 def test_oled_display():
     """Test OLED display functionality"""
     print("\n🖥️  Testing OLED display...")
     
-    try:
-        from oled_display import OLEDDisplay
-        oled = OLEDDisplay()
-        
-        print("✅ OLED display initialized")
-        
-        # Test expressions
-        expressions = ["idle", "listening", "thinking", "speaking"]
-        for expr in expressions:
-            print(f"   Testing expression: {expr}")
-            oled.show_expression(expr)
+    from oled_display import OLEDDisplay
+    oled = OLEDDisplay()
+    
+    print("✅ OLED display initialized")
+    
+    # Test expressions
+    expressions = ["idle", "listening", "thinking", "speaking"]
+    for expr in expressions:
+        print(f"   Testing expression: {expr}")
+        oled.show_expression(expr)
+        assert oled.current_expression == expr, f"Expression {expr} was not applied"
+        if INTERACTIVE:
             time.sleep(1)
-        
-        oled.show_expression("idle")
-        print("✅ OLED expressions test completed")
-        return True
-        
-    except Exception as e:
-        print(f"⚠️  OLED test failed: {e}")
-        return False
+    
+    oled.show_expression("idle")
+    print("✅ OLED expressions test completed")
 
-def test_ai_model():
-    """Test AI model loading"""
+def load_gpt2(model_name="distilgpt2"):
+    """Load the tokenizer and model exercised by test_ai_model"""
     print("\n🤖 Testing AI model...")
     
+    import torch
+    from transformers import GPT2LMHeadModel, GPT2Tokenizer
+    
+    # One tiny forward pass gains nothing from thread pools, and spinning
+    # them up costs more than the pass itself
+    torch.set_num_threads(1)
     try:
-        from transformers import GPT2LMHeadModel, GPT2Tokenizer
-        
-        model_name = "distilgpt2"
-        print(f"   Loading model: {model_name}")
-        
-        tokenizer = GPT2Tokenizer.from_pretrained(model_name)
-        model = GPT2LMHeadModel.from_pretrained(model_name)
-        
-        print("✅ AI model loaded successfully")
-        
-        # Test generation
-        if tokenizer.pad_token is None:
-            tokenizer.pad_token = tokenizer.eos_token
-        
-        inputs = tokenizer.encode("Hello, I am", return_tensors="pt")
-        with torch.no_grad():
-            outputs = model.generate(inputs, max_length=20, do_sample=True)
-        
-        response = tokenizer.decode(outputs[0], skip_special_tokens=True)
-        print(f"   Test generation: {response}")
-        print("✅ AI model generation test completed")
-        return True
-        
-    except Exception as e:
-        print(f"⚠️  AI model test failed: {e}")
-        return False
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Already fixed once inter-op work has started
+    
+    print(f"   Loading model: {model_name}")
+    tokenizer = GPT2Tokenizer.from_pretrained(model_name)
+    model = GPT2LMHeadModel.from_pretrained(model_name).eval()
+    return tokenizer, model
 
+@slow
+def test_ai_model(gpt2):
+    """Test AI model loading"""
+    import torch
+    tokenizer, model = gpt2
+    
+    print("✅ AI model loaded successfully")
+    
+    # A single greedy forward pass is enough to prove the weights work
+    inputs = tokenizer.encode("Hello, I am", return_tensors="pt")
+    with torch.inference_mode():
+        logits = model(inputs).logits
+    
+    assert logits.shape[-1] == model.config.vocab_size, \
+        f"Unexpected logits shape: {tuple(logits.shape)}"
+    print("✅ AI model forward pass test completed")
+
+def _run_ai_model_test():
+    """Run test_ai_model outside pytest, loading the model first"""
+    test_ai_model(load_gpt2())
+
+@hardware
 def test_flask_app():
     """Test Flask application"""
     print("\n🌐 Testing Flask application...")
     
+    # Import without running (this also initializes the OLED)
+    import app
+    print("✅ Flask app imported successfully")
+    
+    # Test routes exist
+    routes = {rule.rule for rule in app.app.url_map.iter_rules()}
+    expected_routes = ['/', '/chat', '/history', '/status']
+    
+    # Report every missing route at once instead of stopping at the first
+    missing_routes = [route for route in expected_routes if route not in routes]
+    for route in expected_routes:
+        if route in routes:
+            print(f"✅ Route {route} exists")
+        else:
+            print(f"❌ Route {route} missing")
+    
+    assert not missing_routes, f"Missing routes: {missing_routes}"
+
+def _list_dir(directory):
+    """Return relative paths of the entries in a directory ('' for cwd)"""
     try:
-        # Import without running
-        import app
-        print("✅ Flask app imported successfully")
-        
-        # Test routes exist
-        routes = [rule.rule for rule in app.app.url_map.iter_rules()]
-        expected_routes = ['/', '/chat', '/history', '/status']
-        
-        for route in expected_routes:
-            if route in routes:
-                print(f"✅ Route {route} exists")
-            else:
-                print(f"❌ Route {route} missing")
-                return False
-        
-        return True
-        
-    except Exception as e:
-        print(f"❌ Flask app test failed: {e}")
-        return False
+        with os.scandir(directory or '.') as entries:
+            return {os.path.join(directory, entry.name) for entry in entries}
+    except FileNotFoundError:
+        return set()
 
 def test_file_structure():
     """Test project file structure"""
     print("\n📁 Testing file structure...")
     
-    required_files = [
-        'app.py',
-        'oled_display.py',
-        'requirements.txt',
-        'templates/index.html',
-        'static/style.css',
-        'static/script.js'
-    ]
+    # One directory listing per folder instead of one stat() per file
+    found = set()
+    for directory in _REQUIRED_DIRS:
+        found.update(_list_dir(directory))
+    missing_files = _REQUIRED_FILES - found
     
-    missing_files = []
-    for file_path in required_files:
-        if os.path.exists(file_path):
-            print(f"✅ {file_path}")
-        else:
+    for file_path in sorted(_REQUIRED_FILES):
+        if file_path in missing_files:
             print(f"❌ {file_path} missing")
-            missing_files.append(file_path)
-    
-    if missing_files:
-        print(f"❌ Missing files: {missing_files}")
-        return False
+        else:
+            print(f"✅ {file_path}")
     
-    return True
+    assert not missing_files, f"Missing files: {sorted(missing_files)}"
 
-def main():
+def main(argv=None):
     """Run all tests"""
-    print("🚀 AI Assistant System Test")
-    print("===========================")
-    
-    tests = [
-        ("File Structure", test_file_structure),
-        ("Python Imports", test_imports),
-        ("Flask Application", test_flask_app),
-        ("OLED Display", test_oled_display),
-        ("AI Model", test_ai_model),
+    global INTERACTIVE
+    parser = argparse.ArgumentParser(description="AI Assistant system test")
+    parser.add_argument("--interactive", action="store_true",
+                        help="pause on each OLED expression for visual inspection")
+    INTERACTIVE = parser.parse_args(argv).interactive
+    
+    sys.stdout.write("🚀 AI Assistant System Test\n===========================\n")
+    
+    # Each job runs its tests in order; jobs run concurrently. The Flask
+    # and OLED tests both drive the SSD1306 at 0x3C, so they share a job
+    jobs = [
+        [("File Structure", test_file_structure)],
+        [("Python Imports", test_imports)],
+        [("Flask Application", test_flask_app),
+         ("OLED Display", test_oled_display)],
+        [("AI Model", _run_ai_model_test)],
     ]
+    tests = [test for job in jobs for test in job]
     
-    results = []
-    for test_name, test_func in tests:
+    # Print each test's buffered output as it finishes to keep the log readable
+    real_stdout = sys.stdout
+    stdout = _ThreadLocalStdout(real_stdout)
+    sys.stdout = stdout
+    
+    def run(test_name, test_func):
+        stdout.capture()
         try:
-            result = test_func()
-            results.append((test_name, result))
+            test_func()
+            result = True
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+            result = False
         except Exception as e:
             print(f"❌ {test_name} test crashed: {e}")
-            results.append((test_name, False))
+            result = False
+        return result, stdout.release()
     
-    print("\n📊 Test Results Summary:")
-    print("========================")
+    def run_job(job):
+        return [(test_name, *run(test_name, test_func)) for test_name, test_func in job]
+    
+    outcomes = {}
+    try:
+        with stdout, ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            futures = [executor.submit(run_job, job) for job in jobs]
+            for future in as_completed(futures):
+                for test_name, result, output in future.result():
+                    stdout.write(output)
+                    outcomes[test_name] = result
+    finally:
+        sys.stdout = real_stdout
+    
+    results = [(test_name, outcomes[test_name]) for test_name, _ in tests]
+    
+    # Build the summary in memory and emit it with a single write
+    report = io.StringIO()
+    print("\n📊 Test Results Summary:", file=report)
+    print("========================", file=report)
     
     passed = 0
     for test_name, result in results:
         status = "✅ PASS" if result else "❌ FAIL"
-        print(f"{status} {test_name}")
+        print(f"{status} {test_name}", file=report)
         if result:
             passed += 1
     
-    print(f"\nTests passed: {passed}/{len(results)}")
+    print(f"\nTests passed: {passed}/{len(results)}", file=report)
     
     if passed == len(results):
-        print("\n🎉 All tests passed! System is ready to run.")
-        print("Start with: python app.py")
+        print("\n🎉 All tests passed! System is ready to run.", file=report)
+        print("Start with: python app.py", file=report)
     else:
-        print("\n⚠️  Some tests failed. Check the issues above.")
-        print("The system may still work with limited functionality.")
+        print("\n⚠️  Some tests failed. Check the issues above.", file=report)
+        print("The system may still work with limited functionality.", file=report)
+    
+    sys.stdout.write(report.getvalue())
+    sys.stdout.flush()
     
     return passed == len(results)
 